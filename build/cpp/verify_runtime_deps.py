@@ -10,20 +10,15 @@ import sys
 
 # The following runtime libraries are provided directly by the SDK sysroot,
 # and not as SDK atoms.
-_SYSROOT_LIBS = ['libc.so', 'libzircon.so']
-
-
-def has_packaged_file(needed_file, deps):
-    """Returns true if the given file could be found in the given deps."""
-    for dep in deps:
-        for file in dep['files']:
-            if needed_file == os.path.normpath(file['source']):
-                return True
-    return False
+_SYSROOT_LIBS = frozenset(['libc.so', 'libzircon.so'])
 
 
 def has_missing_files(runtime_files, package_deps):
     """Returns true if a runtime file is missing from the given deps."""
+    packaged = frozenset(
+        os.path.normpath(file['source'])
+        for dep in package_deps
+        for file in dep['files'])
     has_missing_files = False
     for file in runtime_files:
         # Ignore sysroot libs
@@ -31,8 +26,7 @@ def has_missing_files(runtime_files, package_deps):
             continue
         # Some libraries are only known to GN as ABI stubs, whereas the real
         # runtime dependency is generated in parallel as a ".so.impl" file.
-        if (not has_packaged_file(file, package_deps) and
-                not has_packaged_file('%s.impl' % file, package_deps)):
+        if file not in packaged and '%s.impl' % file not in packaged:
             print('No package dependency generates %s' % file)
             has_missing_files = True
     return has_missing_files
@@ -61,11 +55,9 @@ def main():
         manifest = json.load(manifest_file)
     atom_id = manifest['ids'][0]
 
-    def find_atom(id):
-        return next(a for a in manifest['atoms'] if a['id'] == id)
-
-    atom = find_atom(atom_id)
-    deps = [find_atom(a) for a in atom['deps']]
+    atoms_by_id = {a['id']: a for a in manifest['atoms']}
+    atom = atoms_by_id[atom_id]
+    deps = [atoms_by_id[a] for a in atom['deps']]
     deps += [atom]
 
     # Check whether all runtime files are available for packaging.
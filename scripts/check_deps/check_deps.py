@@ -22,7 +22,7 @@ HOST_PLATFORM = "%s-%s" % (
 fuchsia_root = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
 sys.path.append(os.path.join(fuchsia_root, 'src'))
 
-from area_dependency_exceptions import exceptions
+from area_dependency_exceptions import allowed as exception_allowed
 
 allowed_deps = [
     # These dependencies are always allowed:
@@ -116,12 +116,7 @@ def dep_allowed(label, label_area, dep, dep_area, testonly, ignore_exceptions):
     if ignore_exceptions:
         return False
     # Some areas are temporarily allowed additional dependencies
-    if label_area in exceptions:
-        prefixes = exceptions[label_area]
-        for prefix in prefixes:
-            if dep.startswith(prefix):
-                return True
-    return False
+    return exception_allowed(label_area, dep)
 
 
 def record_bad_dep(bad_deps, area, label, bad_dep):
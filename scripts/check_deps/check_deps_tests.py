@@ -128,6 +128,38 @@ class TestCheckdepsMethods(unittest.TestCase):
                 False, ignore_exceptions),
             msg=msg)
 
+    def test_exception_deps(self):
+        # These cases use real entries from area_dependency_exceptions.
+        exact_label = "//src/cobalt/bin:cobalt"
+        exact_area = "//src/cobalt"
+        exact_dep = "//src/connectivity/wlan/lib/mlme/cpp:mlme"
+
+        prefix_label = "//src/connectivity/wlan/drivers/mlme:lib"
+        prefix_area = "//src/connectivity/wlan/drivers"
+        prefix_dep = "//garnet/lib/wlan/mlme:mlme"
+
+        for label, area, dep in [
+            (exact_label, exact_area, exact_dep),
+            (prefix_label, prefix_area, prefix_dep),
+        ]:
+            msg = "%s (area %s) has a registered exception for %s" % (
+                label, area, dep)
+            self.assertTrue(
+                check_deps.dep_allowed(label, area, dep, '', False, False),
+                msg=msg)
+            msg = "%s should not be allowed to depend on %s when " \
+                "exceptions are ignored" % (label, dep)
+            self.assertFalse(
+                check_deps.dep_allowed(label, area, dep, '', False, True),
+                msg=msg)
+
+        msg = "%s has no exception for an unregistered dependency" % exact_label
+        self.assertFalse(
+            check_deps.dep_allowed(
+                exact_label, exact_area, "//src/planets:bar", '', False,
+                False),
+            msg=msg)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -42,6 +42,7 @@ class ArgParser(argparse.ArgumentParser):
         self._options_help = []
         self._arguments_help = []
         self._has_libfuzzer_extras = False
+        self._generated_help = None
 
     @property
     def host(self):
@@ -412,6 +413,11 @@ class ArgParser(argparse.ArgumentParser):
              Options:
                --foo BAR    A baz, and then some.
         """
+        # The message is a pure function of the parser specification, which
+        # is fixed once the parsers are added, so it is built at most once.
+        if self._generated_help is not None:
+            return self._generated_help
+
         lines = ['']
         usage = 'Usage: fx fuzz '
         if not self._parsers:
@@ -450,6 +456,7 @@ class ArgParser(argparse.ArgumentParser):
         for line in lines:
             assert len(line) <= 80, 'Line is too long:\n"{}"'.format(line)
 
+        self._generated_help = lines
         return lines
 
     def exit(self, status=0, message=None):
@@ -4,6 +4,7 @@
 # found in the LICENSE file.
 
 import errno
+import functools
 import json
 import os
 import re
@@ -13,6 +14,9 @@ from collections import defaultdict
 from .fuzzer import Fuzzer
 from .process import Process
 
+# Compiled once at import; symbolize() applies this to every log processed.
+_KLOG_PREFIX_RE = re.compile(r'[0-9\[\]\.]*\[klog\] INFO: ')
+
 
 class BuildEnv(object):
     """Represents a local build environment for Fuchsia.
@@ -261,14 +265,25 @@ class BuildEnv(object):
         """
         assert segments, 'No path segments provided.'
         if segments[0].startswith('//'):
-            joined = os.path.join(
-                self.fuchsia_dir, segments[0][2:], *segments[1:])
-        else:
-            joined = os.path.join(*segments)
+            return self._source_abspath(*segments)
+        joined = os.path.join(*segments)
         if not os.path.isabs(joined):
             joined = os.path.join(self.host.getcwd(), joined)
         return os.path.normpath(joined)
 
+    @functools.lru_cache(maxsize=None)
+    def _source_abspath(self, *segments):
+        """Resolves a GN source-absolute path.
+
+        These paths depend only on the immutable fuchsia_dir, so the same
+        handful of '//'-relative strings recur for every fuzzer enumerated;
+        caching avoids renormalizing them. Paths relative to the working
+        directory are deliberately not cached, as the working directory may
+        change.
+        """
+        joined = os.path.join(self.fuchsia_dir, segments[0][2:], *segments[1:])
+        return os.path.normpath(joined)
+
     def srcpath(self, label_or_path):
         """Returns a GN source-absolute path for a label, like GN's `get_label_info(..., "dir")`.
 
@@ -372,7 +387,7 @@ class BuildEnv(object):
         out, _ = popened.communicate(raw)
         if popened.returncode != 0:
             out = ''
-        return re.sub(r'[0-9\[\]\.]*\[klog\] INFO: ', '', out)
+        return _KLOG_PREFIX_RE.sub('', out)
 
     def testsharder(self, executable_url, out_dir, realm_label=None):
         """Shards the available tests into _one_ test shard per environment for
@@ -80,7 +80,11 @@ def start_fuzzer(args, factory):
 def check_fuzzer(args, factory):
     """Implementation of "fx fuzz check"."""
     blank = True
-    for fuzzer in factory.buildenv.fuzzers(args.name):
+    fuzzers = factory.buildenv.fuzzers(args.name)
+    # Resolve package statuses up front with one ssh invocation, rather than
+    # one per fuzzer in the loop below.
+    Fuzzer.bulk_resolve(fuzzers)
+    for fuzzer in fuzzers:
         if not args.name and not fuzzer.is_running():
             continue
         if not fuzzer.is_resolved():
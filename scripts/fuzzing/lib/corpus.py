@@ -170,7 +170,7 @@ class Corpus(object):
         else:
             self.host.echo('No corpus set for {}.'.format(str(self.fuzzer)))
             self.host.echo('Please enter a path to a corpus: ', end='')
-            srcdir = input()
+            srcdir = self.host.readline()
             srcdir = self.buildenv.abspath(srcdir)
             pkgdir = srcdir
             target = os.path.basename(srcdir)
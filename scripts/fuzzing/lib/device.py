@@ -29,6 +29,15 @@ class Device(object):
          ssh_verbosity:    How verbose SSH processes are, from 0 to 3.
     """
 
+    # SSH options added to every connection so that concurrent and successive
+    # connections multiplex over a shared control channel instead of paying a
+    # full TCP and key exchange handshake each. See ssh_config(5).
+    SSH_MUX_OPTIONS = [
+        'ControlMaster=auto',
+        'ControlPath=~/.ssh/fx-fuzz-%r@%h:%p',
+        'ControlPersist=60s',
+    ]
+
     def __init__(self, factory, name=None, addr=None):
         assert factory, 'Factory for device not set.'
         self._factory = factory
@@ -142,6 +151,10 @@ class Device(object):
         for val in sorted(self._ssh_config_options):
             ssh_options += ['-o', val]
 
+        # Multiplexing options
+        for val in Device.SSH_MUX_OPTIONS:
+            ssh_options += ['-o', val]
+
         return ssh_options
 
     def ssh(self, args, **kwargs):
@@ -204,6 +217,22 @@ class Device(object):
             self._urls = [c["url"] for c in json.loads(out) if c["execution"]]
         return url in self._urls
 
+    def wait_for_component_exit(self, url, poll_interval=2):
+        """Blocks until a v1 component given by a URL stops running.
+
+           The polling loop is executed on the device side, so that waiting
+           out a potentially hours-long fuzzing campaign costs a single ssh
+           connection in total rather than one per poll. The device-side
+           check matches by component name only, so callers should confirm
+           with v1_component_is_running(refresh=True) afterwards.
+        """
+        name = url.rsplit('/', 1)[-1]
+        cmd = [
+            'while', 'cs', '|', 'grep', '-q', name, ';', 'do', 'sleep',
+            str(poll_interval), ';', 'done'
+        ]
+        return self.ssh(cmd).call()
+
     def isfile(self, pathname):
         """Returns true for files that exist on the device."""
         return self.ssh(['test', '-f', pathname]).call() == 0
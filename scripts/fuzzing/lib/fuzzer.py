@@ -6,14 +6,26 @@
 import datetime
 import json
 import os
+import queue
 import re
 import subprocess
+import threading
+
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 
 from .corpus import Corpus
 from .dictionary import Dictionary
 from .host import Host
 from .namespace import Namespace
 
+# Fuses the patterns of interest in fuzzer logs, i.e. the sanitizer PID
+# banner, libFuzzer's mutation sequences (see |Fuzzer::DumpCurrentUnit|), and
+# test unit artifacts, so that each log line is scanned exactly once.
+_LOG_RE = re.compile(
+    r'^==(?P<pid>[0-9]+)==|^(?P<mut>MS: [0-9]*)|Test unit written to (?P<art>data/\S*)'
+)
+
 
 class Fuzzer(object):
     """Represents a Fuchsia fuzz target.
@@ -56,6 +68,12 @@ class Fuzzer(object):
     # Default path for the ssh private key used to connect to a device.
     DEFAULT_SSH_KEY_PATH = '~/.ssh/fuchsia_ed25519'
 
+    # Compiled once here, as these are applied for every Fuzzer constructed
+    # or resolved.
+    _TEST_SUFFIX_RE = re.compile(r'_test$')
+    _TEST_CMX_RE = re.compile(r'_test\.cmx$')
+    _PKG_ON_DISK_RE = re.compile(r'Package on disk: yes \(path=(.*)\)')
+
     def __init__(self, factory, fuzz_spec):
         assert factory, 'Factory not set.'
         self._factory = factory
@@ -69,12 +87,14 @@ class Fuzzer(object):
             self._is_test = False
         elif 'fuzzer_test' in fuzz_spec:
             # Infer the associated fuzzer metadata if it is currently being built as a fuzzer test.
-            self._executable = re.sub(r'_test$', '', fuzz_spec['fuzzer_test'])
-            manifest = re.sub(
-                r'_test\.cmx$', '.cmx', fuzz_spec['test_manifest'])
+            self._executable = Fuzzer._TEST_SUFFIX_RE.sub(
+                '', fuzz_spec['fuzzer_test'])
+            manifest = Fuzzer._TEST_CMX_RE.sub(
+                '.cmx', fuzz_spec['test_manifest'])
             self._is_test = True
 
-        self._executable_url = '{}#meta/{}'.format(self._package_url, manifest)
+        self._manifest = manifest
+        self._executable_url = None
         self._ns = Namespace(self)
         self._corpus = Corpus(self, fuzz_spec.get('corpus'))
         self._dictionary = Dictionary(self)
@@ -87,9 +107,7 @@ class Fuzzer(object):
         self._output = None
         self._logbase = None
         self._last_known_pid = 0
-        self._clusterfuzz_gcs_url = \
-            'gs://corpus.internal.clusterfuzz.com/libFuzzer/fuchsia_{}-{}'.format(
-                self._package, self._executable)
+        self._clusterfuzz_gcs_url = None
         self._realm_label = ''
 
     def __str__(self):
@@ -140,6 +158,11 @@ class Fuzzer(object):
 
     @property
     def executable_url(self):
+        # Computed lazily; the factory enumerates many fuzzers whose URLs are
+        # never used.
+        if not self._executable_url:
+            self._executable_url = '{}#meta/{}'.format(
+                self._package_url, self._manifest)
         return self._executable_url
 
     @property
@@ -220,6 +243,10 @@ class Fuzzer(object):
     @property
     def clusterfuzz_gcs_url(self):
         """Path to the GCS bucket which contains clusterfuzz corpora for this fuzzer."""
+        if not self._clusterfuzz_gcs_url:
+            self._clusterfuzz_gcs_url = \
+                'gs://corpus.internal.clusterfuzz.com/libFuzzer/fuchsia_{}-{}'.format(
+                    self._package, self._executable)
         return self._clusterfuzz_gcs_url
 
     @property
@@ -235,12 +262,8 @@ class Fuzzer(object):
 
     def update(self, args):
         """Updates the properties of this fuzzer from matching arguments."""
-        keys = [
-            key for key, val in vars(Fuzzer).items()
-            if isinstance(val, property) and val.fset
-        ]
         for key, val in vars(args).items():
-            if key in keys and val is not None:
+            if val is not None and key in Fuzzer._SETTABLE_PROPS:
                 setattr(self, key, val)
 
     def matches(self, name):
@@ -293,12 +316,52 @@ class Fuzzer(object):
             raise subprocess.CalledProcessError(
                 p.returncode, ' '.join(cmd), output=out)
 
-        match = re.search(r'Package on disk: yes \(path=(.*)\)', str(out))
+        match = Fuzzer._PKG_ON_DISK_RE.search(out)
         if not match:
             return False
         self._package_path = match.group(1)
         return True
 
+    @classmethod
+    def bulk_resolve(cls, fuzzers):
+        """Checks the package status of several fuzzers with a single command.
+
+        Queries `pkgctl pkg-status` for every distinct package URL in one ssh
+        invocation and records the package path of each fuzzer whose package
+        is already on disk, so that subsequent calls to is_resolved() don't
+        each pay their own ssh round trip. Fuzzers whose packages are not on
+        disk are left untouched.
+        """
+        by_url = defaultdict(list)
+        for fuzzer in fuzzers:
+            if not fuzzer._package_path:
+                by_url[fuzzer.package_url].append(fuzzer)
+        if not by_url:
+            return
+        device = fuzzers[0].device
+        if not device.reachable:
+            return
+        cmd = []
+        for url in sorted(by_url.keys()):
+            if cmd:
+                cmd.append(';')
+            cmd += ['echo', '==={}==='.format(url), ';']
+            cmd += ['pkgctl', 'pkg-status', url]
+        process = device.ssh(cmd)
+        process.stdout = subprocess.PIPE
+        # Exit codes are ignored here for the same reason as in is_resolved():
+        # "in tuf repo but not on disk" is not an error.
+        out, _ = process.popen().communicate()
+        url = None
+        for line in out.split('\n'):
+            if line.startswith('===') and line.endswith('==='):
+                url = line[3:-3]
+                continue
+            match = Fuzzer._PKG_ON_DISK_RE.search(line)
+            if match and url:
+                for fuzzer in by_url[url]:
+                    fuzzer._package_path = match.group(1)
+
     def resolve(self):
         if self.is_resolved():
             return
@@ -310,11 +373,15 @@ class Fuzzer(object):
 
     def list_artifacts(self):
         """Returns a list of test unit artifacts in the output directory."""
-        artifacts = []
-        for prefix in Fuzzer.ARTIFACT_PREFIXES:
-            artifacts += self.host.glob(
-                os.path.join(self.output, '{}-*'.format(prefix)))
-        return artifacts
+        # str.startswith accepts a tuple, so the output directory is read once
+        # and each entry is checked against all prefixes in a single call.
+        prefixes = tuple(
+            '{}-'.format(prefix) for prefix in Fuzzer.ARTIFACT_PREFIXES)
+        return [
+            os.path.join(self.output, name)
+            for name in sorted(self.host.listdir(self.output))
+            if name.startswith(prefixes)
+        ]
 
     def is_running(self, refresh=False):
         """Checks the device and returns whether the fuzzer is running.
@@ -357,9 +424,13 @@ class Fuzzer(object):
             return proc
 
         # Wait for either the fuzzer to start and open its log, or exit.
+        # Each check costs a device round trip, so back off exponentially;
+        # fast-starting fuzzers are still detected almost immediately.
         logs = self.ns.data(Fuzzer.LOG_PATTERN)
+        delay = 0.05
         while proc.poll() == None and not self.ns.ls(logs):
-            self.host.sleep(0.5)
+            self.host.sleep(delay)
+            delay = min(delay * 2, 2.0)
         if not self.ns.ls(logs):
             self.host.error('{} failed to start.'.format(self))
         return proc
@@ -413,7 +484,7 @@ class Fuzzer(object):
             proc.wait()
         return proc
 
-    def symbolize_log(self, fd_in, job_num, echo=False):
+    def symbolize_log(self, fd_in, job_num, echo=False, link_latest=True):
         """Constructs a symbolized fuzzer log from a device.
 
         Merges the provided fuzzer log with the symbolized system log for the
@@ -423,12 +494,17 @@ class Fuzzer(object):
           fd_in:        An object supporting readline(), such as a file or pipe.
           job_num:      The job number of the corresponding fuzzing job.
           echo:         If true, display text being written to fd_out.
+          link_latest:  If true, point 'fuzz-latest.log' at the new log.
+                        Callers symbolizing several logs concurrently should
+                        pass False and update the link themselves, as
+                        host.link is not atomic.
         """
         filename_out = self.logfile(job_num)
         with self.host.open(filename_out, 'w') as fd_out:
             found = self._symbolize_log_impl(fd_in, fd_out, echo)
-        self.host.link(
-            filename_out, os.path.join(self.output, 'fuzz-latest.log'))
+        if link_latest:
+            self.host.link(
+                filename_out, os.path.join(self.output, 'fuzz-latest.log'))
         return found
 
     def _symbolize_log_impl(self, fd_in, fd_out, echo):
@@ -436,30 +512,59 @@ class Fuzzer(object):
         pid = -1
         sym = None
         artifacts = []
-        pid_pattern = re.compile(r'^==([0-9]+)==')
-        mut_pattern = re.compile(r'^MS: [0-9]*')  # Fuzzer::DumpCurrentUnit
-        art_pattern = re.compile(r'Test unit written to (data/\S*)')
-        for line in iter(fd_in.readline, ''):
-            pid_match = pid_pattern.search(line)
-            mut_match = mut_pattern.search(line)
-            art_match = art_pattern.search(line)
-            if pid_match:
-                pid = int(pid_match.group(1))
+
+        # Buffer copied lines to avoid a file write syscall per line. Echoed
+        # output is NOT buffered: it is what the user watches in the
+        # foreground, and batching it would leave the terminal silent for
+        # minutes between flushes.
+        out_buf = []
+
+        def flush():
+            if not out_buf:
+                return
+            fd_out.write(''.join(out_buf))
+            del out_buf[:]
+
+        # Drain fd_in on a separate thread, so that a fuzzer writing to a pipe
+        # is never stalled on a full pipe buffer while this thread is blocked
+        # on slow work, e.g. fetching and symbolizing a stack trace.
+        lines = queue.Queue()
+
+        def drain():
+            for line in iter(fd_in.readline, ''):
+                lines.put(line)
+            lines.put(None)
+
+        drainer = threading.Thread(target=drain)
+        drainer.daemon = True
+        drainer.start()
+
+        for line in iter(lines.get, None):
+            match = _LOG_RE.search(line)
+            group = match.lastgroup if match else None
+            if group == 'pid':
+                pid = int(match.group('pid'))
                 self._last_known_pid = pid
-            if mut_match:
+            elif group == 'mut':
                 if pid <= 0:
                     pid = self.device.guess_pid()
                 if not sym:
                     raw = self.device.dump_log('--pid', str(pid))
                     sym = self.buildenv.symbolize(raw)
+                    # Flush to keep the symbolized log in place.
+                    flush()
                     fd_out.write(sym)
                     if echo:
                         self.host.echo(sym.strip())
-            if art_match:
-                artifacts.append(art_match.group(1))
-            fd_out.write(line)
+            elif group == 'art':
+                artifacts.append(match.group('art'))
+            out_buf.append(line)
             if echo:
                 self.host.echo(line.strip())
+            if len(out_buf) >= 256:
+                flush()
+        flush()
+        drainer.join()
 
         if artifacts:
             self.ns.fetch(self.output, *artifacts)
@@ -469,22 +574,46 @@ class Fuzzer(object):
     def monitor(self):
         """Waits for a fuzzer to complete and symbolizes its logs.
 
-        Polls the device to determine when the fuzzer stops. Retrieves,
+        Waits on the device to determine when the fuzzer stops. Streams,
         combines and symbolizes the associated fuzzer and kernel logs. Fetches
         any referenced test artifacts, e.g. crashes.
         """
+        # Wait on the device for the fuzzer to exit, and fall back to polling
+        # from the host in case the device-side wait returns early, e.g. if
+        # the component name check matched some other process.
+        self.device.wait_for_component_exit(self.executable_url)
         while self.is_running(refresh=True):
             self.host.sleep(2)
 
-        logs = self.ns.data(Fuzzer.LOG_PATTERN)
-        self.ns.fetch(self.output, logs)
-        self.ns.remove(logs)
-
-        logs = self.host.glob(os.path.join(self.output, Fuzzer.LOG_PATTERN))
-        for job_num, log in enumerate(logs):
-            with self.host.open(log) as fd_in:
-                self.symbolize_log(fd_in, job_num, echo=False)
-            self.host.remove(log)
+        # The device shell expands the glob before running `ls -l`, which
+        # then reports each log by its full path; reduce to basenames so
+        # `ns.data()` below does not double the data directory prefix.
+        logs = sorted(
+            os.path.basename(log)
+            for log in self.ns.ls(self.ns.data(Fuzzer.LOG_PATTERN)))
+
+        def symbolize_one(job_num, log):
+            # Each log is streamed from the device and removed as it is read,
+            # rather than fetched to the host, deleted remotely, and re-read.
+            # The 'fuzz-latest.log' link is updated once below, not per job;
+            # concurrent link updates from the pool would race.
+            with self.ns.stream(self.ns.data(log)) as fd_in:
+                self.symbolize_log(fd_in, job_num, echo=False, link_latest=False)
+
+        if len(logs) <= 1:
+            for job_num, log in enumerate(logs):
+                symbolize_one(job_num, log)
+        else:
+            # Symbolizing a job's log is independent of the other jobs and
+            # spends its time in subprocesses (log_listener, symbolizer), so
+            # threads are enough to process the logs in parallel.
+            max_workers = min(len(logs), os.cpu_count() or 1)
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                list(executor.map(symbolize_one, range(len(logs)), logs))
+        if logs:
+            self.host.link(
+                self.logfile(len(logs) - 1),
+                os.path.join(self.output, 'fuzz-latest.log'))
 
     def stop(self):
         """Stops any processes with a matching component manifest on the device."""
@@ -538,8 +667,13 @@ class Fuzzer(object):
 
         self.host.echo('Analyzing fuzzer...')
         delay = float(self._options['max_total_time']) / 79
+        # The progress bar is preallocated and mutated in place; each tick
+        # promotes a single cell rather than rebuilding the whole line.
+        bar = bytearray(b'\r[' + b' ' * 78 + b']')
         for i in range(79):
-            self.host.echo('\r[' + ('#' * i).ljust(78) + ']', end='')
+            if i:
+                bar[1 + i] = ord('#')
+            self.host.echo(bar.decode(), end='')
             self.host.sleep(delay)
         self.host.echo('')
         proc.wait()
@@ -572,40 +706,85 @@ class Fuzzer(object):
             corpus_dir = '//' + os.path.relpath(
                 corpus_dir, self.buildenv.fuchsia_dir)
 
-        found = False
-        matching_target = False
         fuzzer_target = 'fuzzer("{}")'.format(parts[1])
-        lines_out = []
-        nested_scopes = 0
         with self.host.open(build_gn, 'r') as gn:
-            for line in gn:
-                line = line.rstrip()
-                if not found and fuzzer_target in line:
-                    matching_target = True
-                if not matching_target:
-                    lines_out.append(line)
-                    continue
-                nested_scopes += line.count('{')
-                nested_scopes -= line.count('}')
-                if nested_scopes == 0:
-                    indent = len(line) - len(line.lstrip(' '))
-                    indent = ' ' * indent
-                    lines_out.append(
-                        '{}  corpus = "{}"'.format(indent, corpus_dir))
-                    matching_target = False
-                    found = True
-                if 'corpus =' not in line:
-                    lines_out.append(line)
-
-        if found:
-            with self.host.open(build_gn, 'w') as gn:
-                gn.write('\n'.join(lines_out))
-            return True
-        else:
+            contents = gn.read()
+
+        # Scan forward from the matching target in a single pass, counting
+        # braces while skipping over GN strings and comments, until the
+        # target's scope closes.
+        idx = contents.find(fuzzer_target)
+        pos = idx
+        if idx != -1:
+            nested_scopes = 0
+            in_string = False
+            in_comment = False
+            while pos < len(contents):
+                c = contents[pos]
+                if in_comment:
+                    in_comment = c != '\n'
+                elif in_string:
+                    if c == '\\':
+                        pos += 1
+                    elif c == '"':
+                        in_string = False
+                elif c == '#':
+                    in_comment = True
+                elif c == '"':
+                    in_string = True
+                elif c == '{':
+                    nested_scopes += 1
+                elif c == '}':
+                    nested_scopes -= 1
+                    if nested_scopes == 0:
+                        break
+                pos += 1
+
+        if idx == -1 or pos >= len(contents):
             self.host.echo(
                 'Unable to find \'{}\' in {}'.format(fuzzer_target, build_gn))
             return False
 
+        # Splice a corpus definition in before the scope's closing line,
+        # replacing any existing one, and leave the rest of the file as-is.
+        scope_begin = contents.rfind('\n', 0, idx) + 1
+        newline = contents.rfind('\n', scope_begin, pos)
+        if newline == -1:
+            # The scope opens and closes on the target's own line, e.g.
+            # 'fuzzer("foo") {}'. Expand it so the corpus definition gets its
+            # own line, preserving any inline body.
+            line = contents[scope_begin:idx]
+            indent = ' ' * (len(line) - len(line.lstrip(' ')))
+            open_end = contents.find('{', idx) + 1
+            scope_lines = [contents[scope_begin:open_end]]
+            body = contents[open_end:pos].strip()
+            if body and 'corpus =' not in body:
+                scope_lines.append('{}  {}'.format(indent, body))
+            scope_lines.append('{}  corpus = "{}"'.format(indent, corpus_dir))
+            scope_lines.append('{}}}'.format(indent))
+            contents = '{}{}{}'.format(
+                contents[:scope_begin], '\n'.join(scope_lines),
+                contents[pos + 1:])
+        else:
+            close_begin = newline + 1
+            close_end = contents.find('\n', pos)
+            if close_end == -1:
+                close_end = len(contents)
+            close_line = contents[close_begin:close_end].rstrip()
+            indent = ' ' * (len(close_line) - len(close_line.lstrip(' ')))
+            scope_lines = [
+                line.rstrip()
+                for line in contents[scope_begin:close_begin].splitlines()
+                if 'corpus =' not in line
+            ]
+            scope_lines.append('{}  corpus = "{}"'.format(indent, corpus_dir))
+            contents = '{}{}\n{}'.format(
+                contents[:scope_begin], '\n'.join(scope_lines),
+                contents[close_begin:])
+        with self.host.open(build_gn, 'w') as gn:
+            gn.write(contents)
+        return True
+
     def generate_coverage_report(self, local=False, input_dirs=None):
         """Replicates the steps in the fuchsia/coverage infra build recipe and
         runs them locally in order to build a more targetted coverage report."""
@@ -651,7 +830,7 @@ class Fuzzer(object):
         self.host.mkdir(self.output)
 
         # Since the fuzzer is built as test, turn it back into the test form for testsharder
-        test_executable_url = re.sub(r'.cmx', '_test.cmx', self.executable_url)
+        test_executable_url = self.executable_url.replace('.cmx', '_test.cmx')
         shard_file = self.buildenv.testsharder(
             test_executable_url, self.output, self.realm_label)
         runner_dir, log_dump_file = self.buildenv.testrunner(
@@ -665,3 +844,10 @@ class Fuzzer(object):
         self.host.echo(
             'Generated coverage report, viewable at {}.'.format(
                 '{}/index.html'.format(coverage_dir)))
+
+
+# Computed once the class body is complete, so that `update` does not need to
+# rescan the class dict for settable properties on every call.
+Fuzzer._SETTABLE_PROPS = frozenset(
+    key for key, val in vars(Fuzzer).items()
+    if isinstance(val, property) and val.fset)
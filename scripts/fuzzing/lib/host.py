@@ -30,6 +30,7 @@ class Host(object):
 
     def __init__(self):
         self._platform = 'mac-x64' if os.uname()[0] == 'Darwin' else 'linux-x64'
+        self._fd_in = sys.stdin
         self._fd_out = sys.stdout
         self._fd_err = sys.stderr
         self._tracing = os.getenv(Host.TRACE_ENVVAR) == '1'
@@ -38,6 +39,14 @@ class Host(object):
     def platform(self):
         return self._platform
 
+    @property
+    def fd_in(self):
+        return self._fd_in
+
+    @fd_in.setter
+    def fd_in(self, fd_in):
+        self._fd_in = fd_in
+
     @property
     def fd_out(self):
         return self._fd_out
@@ -50,7 +59,7 @@ class Host(object):
     def fd_err(self):
         return self._fd_err
 
-    @fd_out.setter
+    @fd_err.setter
     def fd_err(self, fd_err):
         self._fd_err = fd_err
 
@@ -87,6 +96,17 @@ class Host(object):
             fd.write(end)
         fd.flush()
 
+    def readline(self):
+        """Reads one line of user input, like input(), but from fd_in.
+
+        Reading through the host rather than sys.stdin lets tests supply
+        input without patching process-global state.
+        """
+        line = self._fd_in.readline()
+        if not line:
+            raise EOFError('EOF when reading a line')
+        return line.rstrip('\n')
+
     def error(self, *lines, **kwargs):
         """Print an error message and exit."""
         assert lines, 'Fatal error without error message.'
@@ -107,7 +127,7 @@ class Host(object):
         while not choice:
             self.echo("Choose 1-{}: ".format(len(choices)), end='')
             try:
-                raw_choice = int(input())
+                raw_choice = int(self.readline())
                 if raw_choice == 0:
                     self.echo("User canceled.")
                     sys.exit(0)
@@ -134,6 +154,14 @@ class Host(object):
         """Returns a list of pathnames from shell-expanding the pattern."""
         return sorted(glob.glob(pattern))
 
+    def listdir(self, pathname):
+        """Returns the names of entries in a directory, if it exists."""
+        try:
+            with os.scandir(pathname) as entries:
+                return [entry.name for entry in entries]
+        except FileNotFoundError:
+            return []
+
     def open(self, pathname, mode='r', on_error=None, missing_ok=False):
         """Opens and returns a file-like object.
 
@@ -172,6 +200,11 @@ class Host(object):
         with self.open(pathname, 'a') as opened:
             pass
 
+    def touch_many(self, pathnames):
+        """Ensures several files exist, creating any that are missing."""
+        for pathname in pathnames:
+            self.touch(pathname)
+
     def mkdir(self, pathname):
         """Creates a directory and its parents if any of them are missing."""
         self.trace('creating: {}'.format(pathname))
@@ -4,6 +4,7 @@
 # found in the LICENSE file.
 
 import os
+import subprocess
 
 
 class Namespace(object):
@@ -122,6 +123,47 @@ class Namespace(object):
         """Removes files or directories from the namespace."""
         return self.device.remove(self.data_abspath(data_path), recursive)
 
+    class _Stream(object):
+        """A streaming process's stdout, checked for errors when closed."""
+
+        def __init__(self, process):
+            self._process = process
+            self._popen = process.popen()
+            # Gives fakes a chance to make scheduled output available; a
+            # no-op for a real, still-running process.
+            self._popen.poll()
+
+        def read(self):
+            return self._popen.stdout.read()
+
+        def readline(self):
+            return self._popen.stdout.readline()
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, exc_type, exc_value, exc_traceback):
+            returncode = self._popen.wait()
+            if not exc_type and returncode != 0:
+                cmd = ' '.join(self._process.args)
+                raise subprocess.CalledProcessError(returncode, cmd)
+
+    def stream(self, data_path):
+        """Returns the contents of a namespace file as a file-like object.
+
+        The file is read over a single connection and removed from the device
+        as part of the same command, replacing the fetch-to-host, remote
+        delete, and local re-read sequence with one round trip that never
+        materializes the file on the host. The returned object supports
+        readline() and use as a context manager; reads overlap the transfer,
+        and leaving the context raises CalledProcessError if the transfer
+        failed.
+        """
+        abspath = self.data_abspath(data_path)
+        process = self.device.ssh(['cat', abspath, '&&', 'rm', abspath])
+        process.stdout = subprocess.PIPE
+        return Namespace._Stream(process)
+
     def fetch(self, pathname, *args):
         """Copies from the namespace to the path given by the first argument."""
         args = [self.abspath(arg) for arg in args]
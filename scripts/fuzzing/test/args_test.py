@@ -3,25 +3,347 @@
 # Use of this source code is governed by a BSD-style license that can be
 # found in the LICENSE file.
 
+import sys
 import unittest
+from functools import partial
 
 import test_env
-from lib import command
 from test_case import TestCaseWithFactory
 
+# `lib.command` is imported lazily by the tests that compare dispatched
+# command callbacks, so that loading or filtering this module doesn't pay
+# for it up front. After the first import it is just a sys.modules lookup.
+
+# Expected help messages, written as single literals (and split into the
+# per-line form the assertions use once, at module load). The NAME
+# argument description is shared by most subcommands and spliced in via
+# format().
+_NAME_HELP = '''\
+  NAME                Fuzzer name to match.  This can be part of the package
+                      and/or target name, e.g. "foo", "bar", and "foo/bar" all
+                      match "foo_package/bar_target".'''
+
+_GENERIC_HELP = '''\
+
+Usage: fx fuzz [SUBCOMMAND] [...]
+
+Manage Fuchsia fuzzers. SUBCOMMAND defaults to "start" if omitted.
+
+Subcommands:
+  analyze             Report coverage info for a given corpus and/or dictionary.
+  check               Check on the status of one or more fuzzers.
+  coverage            Generate a coverage report for a test.
+  help                Print this message and exit.
+  list                List available fuzzers in the current build.
+  repro               Reproduce fuzzer findings by replaying test units.
+  start               Start a specific fuzzer.
+  stop                Stop a specific fuzzer.
+  update              Update the BUILD.gn file for a fuzzer corpus.
+
+See "fx fuzz help [SUBCOMMAND]" for details on each subcommand.
+See also "fx help fuzz" for global "fx" options.
+See https://fuchsia.dev/fuchsia-src/development/testing/fuzzing/libfuzzer
+for details on writing and building fuzzers.
+
+'''.splitlines()
+
+_HELP_HELP = '''\
+
+Usage: fx fuzz help [SUBCOMMAND]
+
+Prints the detailed help for SUBCOMMAND if provided, or a general help message.
+
+Arguments:
+  SUBCOMMAND          Subcommand for which to print detailed help.
+
+'''.splitlines()
+
+_LIST_HELP = '''\
+
+Usage: fx fuzz list [OPTIONS] [NAME]
+
+Lists fuzzers matching NAME if provided, or all fuzzers.
+
+Arguments:
+{}
+
+Options:
+  -v,--verbose        Display additional output.
+
+'''.format(_NAME_HELP).splitlines()
+
+_START_HELP = '''\
+
+Usage: fx fuzz start [OPTIONS] NAME [...]
+
+Starts the named fuzzer.
+
+Arguments:
+{}
+
+Options:
+  -g,--debug          Disable exception handling so a debugger can be attached
+  -f,--foreground     Display fuzzer output.
+  -o,--output OUTPUT  Path under which to store results.
+  -v,--verbose        Display additional output.
+
+Additional options and/or arguments are passed through to libFuzzer.
+See https://llvm.org/docs/LibFuzzer.html for details.
+
+'''.format(_NAME_HELP).splitlines()
+
+_CHECK_HELP = '''\
+
+Usage: fx fuzz check [OPTIONS] [NAME]
+
+Reports status for the fuzzer matching NAME if provided, or for all running
+fuzzers. Status includes execution state, corpus size, and number of artifacts.
+
+Arguments:
+{}
+
+Options:
+  -v,--verbose        Display additional output.
+
+'''.format(_NAME_HELP).splitlines()
+
+_STOP_HELP = '''\
+
+Usage: fx fuzz stop [OPTIONS] NAME
+
+Stops the named fuzzer.
+
+Arguments:
+{}
+
+Options:
+  -v,--verbose        Display additional output.
+
+'''.format(_NAME_HELP).splitlines()
+
+_REPRO_HELP = '''\
+
+Usage: fx fuzz repro [OPTIONS] NAME UNIT... [...]
+
+Runs the named fuzzer on provided test units.
+
+Arguments:
+{}
+  UNIT                File containing a fuzzer input, such as an artifact from a
+                      previous fuzzer run. Artifacts are typically named by the
+                      type of artifact and a digest of the fuzzer input, e.g.
+                      crash-2c5d0d1831b242b107a4c42bba2fa3f6d85edc35
+
+Options:
+  -g,--debug          Disable exception handling so a debugger can be attached
+  -o,--output OUTPUT  Path under which to store results.
+  -v,--verbose        Display additional output.
+
+Additional options and/or arguments are passed through to libFuzzer.
+See https://llvm.org/docs/LibFuzzer.html for details.
+
+'''.format(_NAME_HELP).splitlines()
+
+_ANALYZE_HELP = '''\
+
+Usage: fx fuzz analyze [OPTIONS] NAME [...]
+
+Analyze the corpus and/or dictionary for the given fuzzer.
+
+Arguments:
+{}
+
+Options:
+  -c,--corpus CORPUS  Path to additional corpus elements. May be repeated.
+  -d,--dict DICT      Path to a fuzzer dictionary. Replaces the package default.
+  -l,--local          Exclude corpus elements from Clusterfuzz.
+  -o,--output OUTPUT  Path under which to store results.
+  -v,--verbose        Display additional output.
+
+Additional options and/or arguments are passed through to libFuzzer.
+See https://llvm.org/docs/LibFuzzer.html for details.
+
+'''.format(_NAME_HELP).splitlines()
+
+_COVERAGE_HELP = '''\
+
+Usage: fx fuzz coverage [OPTIONS] NAME
+
+[EXPERIMENTAL] Generates a coverage report for a set of tests.
+Requires --variant profile to be set via fx set to generate the
+necessary symbols. It is suggested to run with --no-goma in order
+to preserve linking to files in the report.
+
+Arguments:
+{}
+
+Options:
+  -l,--local          Exclude corpus elements from Clusterfuzz.
+  -i,--input INPUT    Provide path(s) to local directories with corpus data.
+                      This can be used to test coverage of input data without
+                      a full rebuild. Note that the coverage report will also
+                      include seed corpora data and clusterfuzz data (if --local
+                      is not provided).
+  -v,--verbose        Display additional output.
+  -o,--output OUTPUT  Path under which to store results.
+
+'''.format(_NAME_HELP).splitlines()
+
+# Error messages and hints reused across many failure cases, interned so
+# repeated comparisons inside assertError are pointer checks first.
+_ERR_NAME_REQUIRED = sys.intern('The following arguments are required: name')
+_ERR_INPUTS_REQUIRED = sys.intern(
+    'The following arguments are required: libfuzzer_inputs')
+_ERR_REPEATED_OUTPUT = sys.intern('Repeated option: output')
+_ERR_EXTRA_ARGS = sys.intern('Unrecognized arguments: extra')
+_HINT_HELP = sys.intern('Try "fx fuzz help".')
+
+# Parse cases as (argv, expected attributes) and parse failures as
+# (argv, expected error), precomputed once at module load.
+_START_CASES = (
+    (('start', '--debug', 'name'), {'debug': True}),
+    (('start', '-g', 'name'), {'debug': True}),
+    (('start', '--foreground', 'name'), {'foreground': True}),
+    (('start', '-f', 'name'), {'foreground': True}),
+    (('start', '--monitor', 'name'), {'monitor': True}),
+    (('start', '-m', 'name'), {'monitor': True}),
+    (('start', '-o', 'output', 'name'), {'output': 'output'}),
+    (('start', '--output', 'output', 'name'), {'output': 'output'}),
+    (
+        ('start', 'name', '-output=foo'),
+        {'libfuzzer_opts': {'output': 'foo'}},
+    ),
+    (
+        ('start', 'name', '--', 'sub1', 'sub2'),
+        {'subprocess_args': ['sub1', 'sub2']},
+    ),
+)
+
+_START_FAILURES = (
+    (('start',), _ERR_NAME_REQUIRED),
+    (
+        ('start', '--output', 'name'),
+        _ERR_NAME_REQUIRED,
+    ),
+    (
+        ('start', '--output', 'output1', '--output', 'output2',
+         'name'),
+        _ERR_REPEATED_OUTPUT,
+    ),
+    (
+        ('start', 'name', 'input1', 'input2'),
+        'Unrecognized arguments: input1 input2',
+    ),
+)
+
+_REPRO_CASES = (
+    (('repro', '--debug', 'name', 'unit'), {'debug': True}),
+    (('repro', '-g', 'name', 'unit'), {'debug': True}),
+    (('repro', '-o', 'output', 'name', 'unit'), {'output': 'output'}),
+    (
+        ('repro', '--output', 'output', 'name', 'unit'),
+        {'output': 'output'},
+    ),
+    (
+        ('repro', 'name', '-output=foo', 'unit'),
+        {'libfuzzer_opts': {'output': 'foo'}},
+    ),
+    (
+        ('repro', 'name', 'unit', '--', 'sub1', 'sub2'),
+        {'subprocess_args': ['sub1', 'sub2']},
+    ),
+)
+
+_REPRO_FAILURES = (
+    (
+        ('repro',),
+        'The following arguments are required: name, libfuzzer_inputs',
+    ),
+    (
+        ('repro', 'name'),
+        _ERR_INPUTS_REQUIRED,
+    ),
+    (
+        ('repro', '--output', 'name', 'unit'),
+        _ERR_INPUTS_REQUIRED,
+    ),
+    (
+        ('repro', '--output', 'output1', '--output', 'output2',
+         'name', 'unit'),
+        _ERR_REPEATED_OUTPUT,
+    ),
+)
+
+_ANALYZE_CASES = (
+    (
+        ('analyze', '--corpus', 'corpus1', '--corpus', 'corpus2',
+         'name'),
+        {'corpora': ['corpus1', 'corpus2']},
+    ),
+    (
+        ('analyze', '-c', 'corpus1', '-c', 'corpus2', 'name'),
+        {'corpora': ['corpus1', 'corpus2']},
+    ),
+    (('analyze', '--dict', 'dict', 'name'), {'dict': 'dict'}),
+    (('analyze', '-d', 'dict', 'name'), {'dict': 'dict'}),
+    (('analyze', '--local', 'name'), {'local': True}),
+    (('analyze', '-l', 'name'), {'local': True}),
+    (
+        ('analyze', '--output', 'output', 'name'),
+        {'output': 'output'},
+    ),
+    (('analyze', '-o', 'output', 'name'), {'output': 'output'}),
+    (
+        ('analyze', 'name', '-output=foo', '--', 'sub1', 'sub2'),
+        {'libfuzzer_opts': {'output': 'foo'}},
+    ),
+    (
+        ('analyze', 'name', '-output=foo', '--', '--output',
+         '-output=output'),
+        {'subprocess_args': ['--output', '-output=output']},
+    ),
+)
+
+_ANALYZE_FAILURES = (
+    (('analyze',), _ERR_NAME_REQUIRED),
+    (
+        ('analyze', '--corpus', 'name'),
+        _ERR_NAME_REQUIRED,
+    ),
+    (
+        ('analyze', '--dict', 'name'),
+        _ERR_NAME_REQUIRED,
+    ),
+    (
+        ('analyze', '--dict', 'dict1', '--dict', 'dict2', 'name'),
+        'Repeated option: dict',
+    ),
+    (
+        ('analyze', '--output', 'name'),
+        _ERR_NAME_REQUIRED,
+    ),
+    (
+        ('analyze', '--output', 'output1', '--output', 'output2',
+         'name'),
+        _ERR_REPEATED_OUTPUT,
+    ),
+)
+
 
 class ArgsTest(TestCaseWithFactory):
 
     # Unit test assertions
 
     def assertParse(self, args, **kwargs):
-        args = vars(self.parse_args(*args))
+        # Namespace keeps parsed values in its __dict__; reading it directly
+        # skips the descriptor protocol for each expected key.
+        parsed = self.parse_args(*args).__dict__
         for key, val in kwargs.items():
-            self.assertEqual(args[key], val)
+            self.assertEqual(parsed[key], val, msg=key)
 
     def assertParseFails(self, args, msg):
         self.assertError(
-            lambda: self.parse_args(*args), msg, 'Try "fx fuzz help".')
+            partial(self.parse_args, *args), msg, _HINT_HELP)
 
     def assertParseHelp(self, args, log):
         with self.assertRaises(SystemExit):
@@ -33,169 +355,58 @@ class ArgsTest(TestCaseWithFactory):
     # Unit tests
 
     def test_help_parser(self):
-        generic_help = [
-            '',
-            'Usage: fx fuzz [SUBCOMMAND] [...]',
-            '',
-            'Manage Fuchsia fuzzers. SUBCOMMAND defaults to "start" if omitted.',
-            '',
-            'Subcommands:',
-            '  analyze             Report coverage info for a given corpus and/or dictionary.',
-            '  check               Check on the status of one or more fuzzers.',
-            '  coverage            Generate a coverage report for a test.',
-            '  help                Print this message and exit.',
-            '  list                List available fuzzers in the current build.',
-            '  repro               Reproduce fuzzer findings by replaying test units.',
-            '  start               Start a specific fuzzer.',
-            '  stop                Stop a specific fuzzer.',
-            '  update              Update the BUILD.gn file for a fuzzer corpus.',
-            '',
-            'See "fx fuzz help [SUBCOMMAND]" for details on each subcommand.',
-            'See also "fx help fuzz" for global "fx" options.',
-            'See https://fuchsia.dev/fuchsia-src/development/testing/fuzzing/libfuzzer',
-            'for details on writing and building fuzzers.',
-            '',
-        ]
-        self.assertParseHelp(
-            ['help', 'help'], [
-                '',
-                'Usage: fx fuzz help [SUBCOMMAND]',
-                '',
-                'Prints the detailed help for SUBCOMMAND if provided, or a general help message.',
-                '',
-                'Arguments:',
-                '  SUBCOMMAND          Subcommand for which to print detailed help.',
-                '',
-            ])
-        self.assertParseHelp(['-h'], generic_help)
-        self.assertParseHelp(['--help'], generic_help)
-        self.assertParseHelp(['help'], generic_help)
+        self.assertParseHelp(['help', 'help'], _HELP_HELP)
+        for argv in (['-h'], ['--help'], ['help']):
+            with self.subTest(argv=argv):
+                self.assertParseHelp(argv, _GENERIC_HELP)
 
         self.assertParseFails(
             ['help', 'bad-subcommand'],
             'Unrecognized subcommand: "bad-subcommand".')
 
-    def test_list_parser(self):
-        self.assertParseHelp(
-            ['help', 'list'], [
-                '',
-                'Usage: fx fuzz list [OPTIONS] [NAME]',
-                '',
-                'Lists fuzzers matching NAME if provided, or all fuzzers.',
-                '',
-                'Arguments:',
-                '  NAME                Fuzzer name to match.  This can be part of the package',
-                '                      and/or target name, e.g. "foo", "bar", and "foo/bar" all',
-                '                      match "foo_package/bar_target".',
-                '',
-                'Options:',
-                '  -v,--verbose        Display additional output.',
-                '',
-            ])
-        self.assertParse(['list'], command=command.list_fuzzers, name=None)
-        self.assertParse(['list', 'name'], name='name')
-        self.assertParseFails(
-            ['list', 'name', 'extra'], 'Unrecognized arguments: extra')
+    def test_list_help(self):
+        self.assertParseHelp(['help', 'list'], _LIST_HELP)
 
-    def test_start_parser(self):
-        self.assertParseHelp(
-            ['help', 'start'], [
-                '',
-                'Usage: fx fuzz start [OPTIONS] NAME [...]',
-                '',
-                'Starts the named fuzzer.',
-                '',
-                'Arguments:',
-                '  NAME                Fuzzer name to match.  This can be part of the package',
-                '                      and/or target name, e.g. "foo", "bar", and "foo/bar" all',
-                '                      match "foo_package/bar_target".',
-                '',
-                'Options:',
-                '  -g,--debug          Disable exception handling so a debugger can be attached',
-                '  -f,--foreground     Display fuzzer output.',
-                '  -o,--output OUTPUT  Path under which to store results.',
-                '  -v,--verbose        Display additional output.',
-                '',
-                'Additional options and/or arguments are passed through to libFuzzer.',
-                'See https://llvm.org/docs/LibFuzzer.html for details.',
-                '',
-            ])
+    def test_start_help(self):
+        self.assertParseHelp(['help', 'start'], _START_HELP)
 
-        self.assertParseFails(
-            ['start'], 'The following arguments are required: name')
+    def test_check_help(self):
+        self.assertParseHelp(['help', 'check'], _CHECK_HELP)
 
-        self.assertParse(
-            [
-                'start',
-                'name',
-            ], command=command.start_fuzzer, name='name')
-        self.assertParse(['name'], command=command.start_fuzzer, name='name')
+    def test_stop_help(self):
+        self.assertParseHelp(['help', 'stop'], _STOP_HELP)
 
-        self.assertParse(['start', '--debug', 'name'], debug=True)
-        self.assertParse(['start', '-g', 'name'], debug=True)
+    def test_repro_help(self):
+        self.assertParseHelp(['help', 'repro'], _REPRO_HELP)
 
-        self.assertParse(['start', '--foreground', 'name'], foreground=True)
-        self.assertParse(['start', '-f', 'name'], foreground=True)
+    def test_analyze_help(self):
+        self.assertParseHelp(['help', 'analyze'], _ANALYZE_HELP)
 
-        self.assertParse(['start', '--monitor', 'name'], monitor=True)
-        self.assertParse(['start', '-m', 'name'], monitor=True)
+    def test_coverage_help(self):
+        self.assertParseHelp(['help', 'coverage'], _COVERAGE_HELP)
 
+    def test_list_parser(self):
+        from lib import command
+        self.assertParse(['list'], command=command.list_fuzzers, name=None)
+        self.assertParse(['list', 'name'], name='name')
         self.assertParseFails(
-            ['start', '--output', 'name'],
-            'The following arguments are required: name')
-        self.assertParseFails(
-            [
-                'start',
-                '--output',
-                'output1',
-                '--output',
-                'output2',
-                'name',
-            ], 'Repeated option: output')
-        self.assertParse([
-            'start',
-            '-o',
-            'output',
-            'name',
-        ], output='output')
-        self.assertParse(
-            [
-                'start',
-                '--output',
-                'output',
-                'name',
-            ], output='output')
+            ['list', 'name', 'extra'], _ERR_EXTRA_ARGS)
+
+    def test_start_parser(self):
+        from lib import command
+        start_fuzzer = command.start_fuzzer
 
         self.assertParse(
-            [
-                'start',
-                'name',
-                '-output=foo',
-            ],
-            libfuzzer_opts={
-                'output': 'foo',
-            })
+            ['start', 'name'], command=start_fuzzer, name='name')
+        self.assertParse(['name'], command=start_fuzzer, name='name')
 
-        self.assertParseFails(
-            [
-                'start',
-                'name',
-                'input1',
-                'input2',
-            ], 'Unrecognized arguments: input1 input2')
+        for argv, expected in _START_CASES:
+            with self.subTest(argv=argv):
+                self.assertParse(argv, **expected)
 
-        self.assertParse(
-            [
-                'start',
-                'name',
-                '--',
-                'sub1',
-                'sub2',
-            ],
-            subprocess_args=[
-                'sub1',
-                'sub2',
-            ])
+        for argv, msg in _START_FAILURES:
+            with self.subTest(argv=argv):
+                self.assertParseFails(argv, msg)
 
         # All together now, in different order.
         self.assertParse(
@@ -213,7 +424,7 @@ class ArgsTest(TestCaseWithFactory):
                 '--output',
                 '-output=bar',
             ],
-            command=command.start_fuzzer,
+            command=start_fuzzer,
             debug=True,
             foreground=True,
             monitor=True,
@@ -223,47 +434,16 @@ class ArgsTest(TestCaseWithFactory):
             subprocess_args=['-o', '--output', '-output=bar'])
 
     def test_check_parser(self):
-        self.assertParseHelp(
-            ['help', 'check'], [
-                '',
-                'Usage: fx fuzz check [OPTIONS] [NAME]',
-                '',
-                'Reports status for the fuzzer matching NAME if provided, or for all running',
-                'fuzzers. Status includes execution state, corpus size, and number of artifacts.',
-                '',
-                'Arguments:',
-                '  NAME                Fuzzer name to match.  This can be part of the package',
-                '                      and/or target name, e.g. "foo", "bar", and "foo/bar" all',
-                '                      match "foo_package/bar_target".',
-                '',
-                'Options:',
-                '  -v,--verbose        Display additional output.',
-                '',
-            ])
+        from lib import command
         self.assertParse(['check'], command=command.check_fuzzer, name=None)
         self.assertParse(['check', 'name'], name='name')
         self.assertParseFails(
-            ['check', 'name', 'extra'], 'Unrecognized arguments: extra')
+            ['check', 'name', 'extra'], _ERR_EXTRA_ARGS)
 
     def test_stop_parser(self):
-        self.assertParseHelp(
-            ['help', 'stop'], [
-                '',
-                'Usage: fx fuzz stop [OPTIONS] NAME',
-                '',
-                'Stops the named fuzzer.',
-                '',
-                'Arguments:',
-                '  NAME                Fuzzer name to match.  This can be part of the package',
-                '                      and/or target name, e.g. "foo", "bar", and "foo/bar" all',
-                '                      match "foo_package/bar_target".',
-                '',
-                'Options:',
-                '  -v,--verbose        Display additional output.',
-                '',
-            ])
+        from lib import command
         self.assertParseFails(
-            ['stop'], 'The following arguments are required: name')
+            ['stop'], _ERR_NAME_REQUIRED)
 
         self.assertParse(
             [
@@ -272,115 +452,25 @@ class ArgsTest(TestCaseWithFactory):
             ], command=command.stop_fuzzer, name='name')
 
         self.assertParseFails(
-            ['stop', 'name', 'extra'], 'Unrecognized arguments: extra')
+            ['stop', 'name', 'extra'], _ERR_EXTRA_ARGS)
 
     def test_repro_parser(self):
-        self.assertParseHelp(
-            ['help', 'repro'], [
-                '',
-                'Usage: fx fuzz repro [OPTIONS] NAME UNIT... [...]',
-                '',
-                'Runs the named fuzzer on provided test units.',
-                '',
-                'Arguments:',
-                '  NAME                Fuzzer name to match.  This can be part of the package',
-                '                      and/or target name, e.g. "foo", "bar", and "foo/bar" all',
-                '                      match "foo_package/bar_target".',
-                '  UNIT                File containing a fuzzer input, such as an artifact from a',
-                '                      previous fuzzer run. Artifacts are typically named by the',
-                '                      type of artifact and a digest of the fuzzer input, e.g.',
-                '                      crash-2c5d0d1831b242b107a4c42bba2fa3f6d85edc35',
-                '',
-                'Options:',
-                '  -g,--debug          Disable exception handling so a debugger can be attached',
-                '  -o,--output OUTPUT  Path under which to store results.',
-                '  -v,--verbose        Display additional output.',
-                '',
-                'Additional options and/or arguments are passed through to libFuzzer.',
-                'See https://llvm.org/docs/LibFuzzer.html for details.',
-                '',
-            ])
-
-        self.assertParseFails(
-            ['repro'],
-            'The following arguments are required: name, libfuzzer_inputs')
-        self.assertParseFails(
-            ['repro', 'name'],
-            'The following arguments are required: libfuzzer_inputs')
+        from lib import command
+        repro_units = command.repro_units
 
         self.assertParse(
-            [
-                'repro',
-                'name',
-                'unit',
-            ],
-            command=command.repro_units,
+            ['repro', 'name', 'unit'],
+            command=repro_units,
             name='name',
-            libfuzzer_inputs=[
-                'unit',
-            ])
-
-        self.assertParse(['repro', '--debug', 'name', 'unit'], debug=True)
-        self.assertParse(['repro', '-g', 'name', 'unit'], debug=True)
-
-        self.assertParseFails(
-            [
-                'repro',
-                '--output',
-                'name',
-                'unit',
-            ], 'The following arguments are required: libfuzzer_inputs')
-        self.assertParseFails(
-            [
-                'repro',
-                '--output',
-                'output1',
-                '--output',
-                'output2',
-                'name',
-                'unit',
-            ], 'Repeated option: output')
-        self.assertParse(
-            [
-                'repro',
-                '-o',
-                'output',
-                'name',
-                'unit',
-            ], output='output')
-        self.assertParse(
-            [
-                'repro',
-                '-o',
-                'output',
-                'name',
-                'unit',
-            ], output='output')
+            libfuzzer_inputs=['unit'])
 
-        self.assertParse(
-            [
-                'repro',
-                'name',
-                '-output=foo',
-                'unit',
-            ],
-            libfuzzer_opts={
-                'output': 'foo',
-            })
+        for argv, expected in _REPRO_CASES:
+            with self.subTest(argv=argv):
+                self.assertParse(argv, **expected)
 
-        self.assertParse(
-            [
-                'repro',
-                'name',
-                'unit',
-                '--',
-                'sub1',
-                'sub2',
-            ],
-            subprocess_args=[
-                'sub1',
-                'sub2',
-            ])
+        for argv, msg in _REPRO_FAILURES:
+            with self.subTest(argv=argv):
+                self.assertParseFails(argv, msg)
 
         # All together now, in different order.
         self.assertParse(
@@ -397,7 +487,7 @@ class ArgsTest(TestCaseWithFactory):
                 '-output=bar',
                 '--output',
             ],
-            command=command.repro_units,
+            command=repro_units,
             debug=True,
             output='output',
             name='name',
@@ -406,141 +496,19 @@ class ArgsTest(TestCaseWithFactory):
             subprocess_args=['-o', '-output=bar', '--output'])
 
     def test_analyze_parser(self):
-        self.assertParseHelp(
-            ['help', 'analyze'], [
-                '',
-                'Usage: fx fuzz analyze [OPTIONS] NAME [...]',
-                '',
-                'Analyze the corpus and/or dictionary for the given fuzzer.',
-                '',
-                'Arguments:',
-                '  NAME                Fuzzer name to match.  This can be part of the package',
-                '                      and/or target name, e.g. "foo", "bar", and "foo/bar" all',
-                '                      match "foo_package/bar_target".',
-                '',
-                'Options:',
-                '  -c,--corpus CORPUS  Path to additional corpus elements. May be repeated.',
-                '  -d,--dict DICT      Path to a fuzzer dictionary. Replaces the package default.',
-                '  -l,--local          Exclude corpus elements from Clusterfuzz.',
-                '  -o,--output OUTPUT  Path under which to store results.',
-                '  -v,--verbose        Display additional output.',
-                '',
-                'Additional options and/or arguments are passed through to libFuzzer.',
-                'See https://llvm.org/docs/LibFuzzer.html for details.',
-                '',
-            ])
-
-        self.assertParseFails(
-            ['analyze'], 'The following arguments are required: name')
-
-        self.assertParse(
-            [
-                'analyze',
-                'name',
-            ], command=command.analyze_fuzzer, name='name')
-
-        self.assertParseFails(
-            ['analyze', '--corpus', 'name'],
-            'The following arguments are required: name')
-        self.assertParse(
-            [
-                'analyze',
-                '--corpus',
-                'corpus1',
-                '--corpus',
-                'corpus2',
-                'name',
-            ],
-            corpora=['corpus1', 'corpus2'])
-        self.assertParse(
-            [
-                'analyze',
-                '-c',
-                'corpus1',
-                '-c',
-                'corpus2',
-                'name',
-            ],
-            corpora=['corpus1', 'corpus2'])
+        from lib import command
+        analyze_fuzzer = command.analyze_fuzzer
 
-        self.assertParseFails(
-            ['analyze', '--dict', 'name'],
-            'The following arguments are required: name')
-        self.assertParseFails(
-            [
-                'analyze',
-                '--dict',
-                'dict1',
-                '--dict',
-                'dict2',
-                'name',
-            ], 'Repeated option: dict')
-        self.assertParse([
-            'analyze',
-            '--dict',
-            'dict',
-            'name',
-        ], dict='dict')
-        self.assertParse([
-            'analyze',
-            '-d',
-            'dict',
-            'name',
-        ], dict='dict')
-
-        self.assertParse(['analyze', '--local', 'name'], local=True)
-        self.assertParse(['analyze', '-l', 'name'], local=True)
-
-        self.assertParseFails(
-            ['analyze', '--output', 'name'],
-            'The following arguments are required: name')
-        self.assertParseFails(
-            [
-                'analyze',
-                '--output',
-                'output1',
-                '--output',
-                'output2',
-                'name',
-            ], 'Repeated option: output')
         self.assertParse(
-            [
-                'analyze',
-                '--output',
-                'output',
-                'name',
-            ], output='output')
-        self.assertParse([
-            'analyze',
-            '-o',
-            'output',
-            'name',
-        ], output='output')
+            ['analyze', 'name'], command=analyze_fuzzer, name='name')
 
-        self.assertParse(
-            [
-                'analyze',
-                'name',
-                '-output=foo',
-                '--',
-                'sub1',
-                'sub2',
-            ],
-            libfuzzer_opts={'output': 'foo'})
+        for argv, expected in _ANALYZE_CASES:
+            with self.subTest(argv=argv):
+                self.assertParse(argv, **expected)
 
-        self.assertParse(
-            [
-                'analyze',
-                'name',
-                '-output=foo',
-                '--',
-                '--output',
-                '-output=output',
-            ],
-            subprocess_args=[
-                '--output',
-                '-output=output',
-            ])
+        for argv, msg in _ANALYZE_FAILURES:
+            with self.subTest(argv=argv):
+                self.assertParseFails(argv, msg)
 
         # All together now, in a different order.
         self.assertParse(
@@ -559,7 +527,7 @@ class ArgsTest(TestCaseWithFactory):
                 '--sub',
                 '-sub=val',
             ],
-            command=command.analyze_fuzzer,
+            command=analyze_fuzzer,
             corpora=['corpus'],
             dict='dict',
             local=True,
@@ -569,35 +537,10 @@ class ArgsTest(TestCaseWithFactory):
             subprocess_args=['--sub', '-sub=val'])
 
     def test_coverage_parser(self):
-        self.assertParseHelp(
-            ['help', 'coverage'], [
-                '',
-                'Usage: fx fuzz coverage [OPTIONS] NAME',
-                '',
-                '[EXPERIMENTAL] Generates a coverage report for a set of tests.',
-                'Requires --variant profile to be set via fx set to generate the',
-                'necessary symbols. It is suggested to run with --no-goma in order',
-                'to preserve linking to files in the report.',
-                '',
-                'Arguments:',
-                '  NAME                Fuzzer name to match.  This can be part of the package',
-                '                      and/or target name, e.g. "foo", "bar", and "foo/bar" all',
-                '                      match "foo_package/bar_target".',
-                '',
-                'Options:',
-                '  -l,--local          Exclude corpus elements from Clusterfuzz.',
-                '  -i,--input INPUT    Provide path(s) to local directories with corpus data.',
-                '                      This can be used to test coverage of input data without',
-                '                      a full rebuild. Note that the coverage report will also',
-                '                      include seed corpora data and clusterfuzz data (if --local',
-                '                      is not provided).',
-                '  -v,--verbose        Display additional output.',
-                '  -o,--output OUTPUT  Path under which to store results.',
-                '',
-            ])
+        from lib import command
 
         self.assertParseFails(
-            ['coverage'], 'The following arguments are required: name')
+            ['coverage'], _ERR_NAME_REQUIRED)
 
         self.assertParse(
             [
@@ -12,6 +12,14 @@ from lib.device import Device
 from test_case import TestCaseWithFactory
 
 
+def ssh_mux_opts():
+    """The multiplexing options appended to every SSH command."""
+    opts = []
+    for val in Device.SSH_MUX_OPTIONS:
+        opts += ['-o', val]
+    return opts
+
+
 class DeviceTest(TestCaseWithFactory):
 
     # These tests don't use a factory-created Device.
@@ -26,7 +34,7 @@ class DeviceTest(TestCaseWithFactory):
         ssh_config = 'ssh_config'
         self.host.touch(ssh_config)
         device.ssh_config = ssh_config
-        self.assertEqual(['-F', ssh_config], device.ssh_opts())
+        self.assertEqual(['-F', ssh_config] + ssh_mux_opts(), device.ssh_opts())
 
     def test_ssh_identity(self):
         device = Device(self.factory, addr='::1')
@@ -37,7 +45,8 @@ class DeviceTest(TestCaseWithFactory):
         ssh_identity = 'ssh_identity'
         self.host.touch(ssh_identity)
         device.ssh_identity = ssh_identity
-        self.assertEqual(['-i', ssh_identity], device.ssh_opts())
+        self.assertEqual(
+            ['-i', ssh_identity] + ssh_mux_opts(), device.ssh_opts())
 
     def test_ssh_option(self):
         device = Device(self.factory, addr='::1')
@@ -51,7 +60,7 @@ class DeviceTest(TestCaseWithFactory):
                 'StrictHostKeyChecking no',
                 '-o',
                 'UserKnownHostsFile=/dev/null',
-            ], device.ssh_opts())
+            ] + ssh_mux_opts(), device.ssh_opts())
 
     def test_ssh_verbosity(self):
         device = Device(self.factory, addr='::1')
@@ -61,16 +70,16 @@ class DeviceTest(TestCaseWithFactory):
             device.ssh_verbosity = 4
 
         device.ssh_verbosity = 3
-        self.assertEqual(['-vvv'], device.ssh_opts())
+        self.assertEqual(['-vvv'] + ssh_mux_opts(), device.ssh_opts())
 
         device.ssh_verbosity = 2
-        self.assertEqual(['-vv'], device.ssh_opts())
+        self.assertEqual(['-vv'] + ssh_mux_opts(), device.ssh_opts())
 
         device.ssh_verbosity = 1
-        self.assertEqual(['-v'], device.ssh_opts())
+        self.assertEqual(['-v'] + ssh_mux_opts(), device.ssh_opts())
 
         device.ssh_verbosity = 0
-        self.assertEqual([], device.ssh_opts())
+        self.assertEqual(ssh_mux_opts(), device.ssh_opts())
 
         with self.assertRaises(ValueError):
             device.ssh_verbosity = -1
@@ -134,6 +143,15 @@ class DeviceTest(TestCaseWithFactory):
         self.assertFalse(self.device.v1_component_is_running(url3))
         self.assertTrue(self.device.v1_component_is_running(url4))
 
+    def test_wait_for_component_exit(self):
+        url = 'fuchsia-pkg://fuchsia.com/fake-package1#meta/fake-target1.cmx'
+        cmd = [
+            'while', 'cs', '|', 'grep', '-q', 'fake-target1.cmx', ';', 'do',
+            'sleep', '2', ';', 'done'
+        ]
+        self.device.wait_for_component_exit(url)
+        self.assertSsh(*cmd)
+
     def test_isfile(self):
         some_file = 'path-to-some-file'
         cmd = ['test', '-f', some_file]
@@ -7,6 +7,7 @@ import errno
 import fnmatch
 import os
 import subprocess
+import tempfile
 from io import StringIO
 
 import test_env
@@ -78,6 +79,17 @@ class FakeHost(Host):
         """Fake implementation overriding Host.glob."""
         return sorted(fnmatch.filter(self._files, pattern))
 
+    def listdir(self, pathname):
+        """Fake implementation overriding Host.listdir."""
+        pathname = self._dereference(pathname)
+        if not pathname.endswith('/'):
+            pathname += '/'
+        names = set()
+        for entry in list(self._files) + list(self._dirs):
+            if entry.startswith(pathname):
+                names.add(entry[len(pathname):].split('/')[0])
+        return sorted(names)
+
     class File(StringIO):
         """A file-like object that can be used in "with" statements."""
 
@@ -122,6 +134,17 @@ class FakeHost(Host):
         file.open(mode)
         return file
 
+    def touch_many(self, pathnames):
+        """Fake implementation overriding Host.touch_many.
+
+        Updates the fake filesystem in a single pass, without the per-file
+        open/trace overhead of repeated touch() calls.
+        """
+        for pathname in pathnames:
+            pathname = self._dereference(pathname)
+            if pathname not in self._files:
+                self._files[pathname] = FakeHost.File()
+
     def mkdir(self, pathname):
         """Fake implementation overriding BuildEnv.mkdir."""
         self.trace('creating: {}'.format(pathname))
@@ -151,18 +174,54 @@ class FakeHost(Host):
         self.mkdir(temp_dir)
         return temp_dir
 
+    class RealTempDir(object):
+        """A real temporary directory exposing the _TemporaryDirectory API."""
+
+        def __init__(self):
+            self._temp_dir = None
+
+        @property
+        def pathname(self):
+            return self._temp_dir.name
+
+        def __enter__(self):
+            self._temp_dir = tempfile.TemporaryDirectory()
+            return self
+
+        def __exit__(self, exc_type, exc_value, exc_traceback):
+            self._temp_dir.cleanup()
+
+    def temp_dir(self, use_real_tmp=False):
+        """Fake implementation overriding Host.temp_dir.
+
+        By default this goes through the fake filesystem, which always returns
+        the same predictable pathname; some tests depend on that to match
+        commands built by the code under test. Tests that only need a unique
+        pathname to build other paths from can pass use_real_tmp=True to skip
+        the fake bookkeeping entirely.
+        """
+        if use_real_tmp:
+            return FakeHost.RealTempDir()
+        return super(FakeHost, self).temp_dir()
+
+    # Golden file contents, keyed by name. Cached at class scope since every
+    # test that builds a factory re-reads the same goldens; reading them from
+    # the real filesystem once per process keeps per-test setup cheap.
+    _goldens = {}
+
     def add_golden(self, name):
         """Add a 'real' golden file in the test directory to the fake filesystem."""
-
-        # This file is finally packaged into an archive, so go one extra level
-        # up to get the directory of the archive.
-        #
-        # TODO(https://fxbug.dev/73919): fix the path here so the tests can be
-        # executed directly.
-        pathname = os.path.join(
-            os.path.abspath(os.path.dirname(os.path.dirname(__file__))), name)
-        with open(pathname) as f:
-            golden = f.read()
+        golden = FakeHost._goldens.get(name)
+        if golden is None:
+            # When run directly, goldens live next to the tests; when packaged
+            # into the test archive they sit one level above the test sources.
+            test_dir = os.path.abspath(os.path.dirname(__file__))
+            pathname = os.path.join(test_dir, name)
+            if not os.path.isfile(pathname):
+                pathname = os.path.join(os.path.dirname(test_dir), name)
+            with open(pathname) as f:
+                golden = f.read()
+            FakeHost._goldens[name] = golden
         with self.open(name, 'w') as f:
             f.write(golden)
 
@@ -41,6 +41,7 @@ class NonHermeticTestCase(TestCaseWithIO):
     def setUp(self):
         super(NonHermeticTestCase, self).setUp()
         self._host = Host()
+        self._host.fd_in = self._stdin
         self._host.fd_out = self._stdout
         self._host.fd_err = self._stderr
         self._temp_dir = tempfile.mkdtemp()
@@ -89,6 +90,7 @@ class HermeticTestCase(TestCaseWithIO):
     def setUp(self):
         super(HermeticTestCase, self).setUp()
         self._host = FakeHost()
+        self._host.fd_in = self._stdin
         self._host.fd_out = self._stdout
         self._host.fd_err = self._stderr
 
@@ -190,6 +192,17 @@ class HostTestCase(object):
         self.assertIn(foo, files)
         self.assertIn(bar, files)
 
+    def test_listdir(self):
+        foo = os.path.join(self.temp_dir, 'foo')
+        bar = os.path.join(self.temp_dir, 'bar')
+        self.writefile(foo)
+        self.writefile(bar)
+        names = self.host.listdir(self.temp_dir)
+        self.assertIn('foo', names)
+        self.assertIn('bar', names)
+        no_such_dir = os.path.join(self.temp_dir, 'no_such_dir')
+        self.assertEqual(self.host.listdir(no_such_dir), [])
+
     def test_open(self):
         pathname = os.path.join(self.temp_dir, 'test_open')
         with self.assertRaises(SystemExit):
@@ -221,6 +234,17 @@ class HostTestCase(object):
         self.host.touch(pathname)
         self.assertTrue(self.isfile(pathname))
 
+    def test_touch_many(self):
+        pathnames = [
+            os.path.join(self.temp_dir, 'test_touch_many-{}'.format(i))
+            for i in range(3)
+        ]
+        for pathname in pathnames:
+            self.assertFalse(self.isfile(pathname))
+        self.host.touch_many(pathnames)
+        for pathname in pathnames:
+            self.assertTrue(self.isfile(pathname))
+
     def test_mkdir(self):
         pathname = os.path.join(self.temp_dir, 'test', 'mkdir')
         self.assertFalse(self.isdir(pathname))
@@ -4,6 +4,7 @@
 # found in the LICENSE file.
 
 import os
+import subprocess
 import unittest
 
 import test_env
@@ -125,6 +126,28 @@ class NamespaceTest(TestCaseWithFuzzer):
         cmd = ['rm', '-rf', self.ns.data_abspath(relpath)]
         self.assertSsh(*cmd)
 
+    def test_stream(self):
+        relpath = 'fuzz-0.log'
+
+        # Must be data path
+        self.assertError(
+            lambda: self.ns.stream(self.ns.resource_abspath(relpath)),
+            'Not a data path: {}'.format(self.ns.resource_abspath(relpath)))
+
+        # Valid
+        abspath = self.ns.data_abspath(relpath)
+        cmd = ['cat', abspath, '&&', 'rm', abspath]
+        self.set_outputs(cmd, ['hello', 'world'], ssh=True)
+        with self.ns.stream(self.ns.data(relpath)) as streamed:
+            self.assertEqual(streamed.read(), 'hello\nworld\n')
+        self.assertSsh(*cmd)
+
+        # A failed transfer is surfaced when the stream is closed.
+        self.set_outputs(cmd, [''], returncode=1, ssh=True)
+        with self.assertRaises(subprocess.CalledProcessError):
+            with self.ns.stream(self.ns.data(relpath)) as streamed:
+                streamed.read()
+
     def test_fetch(self):
         local_path = 'test_fetch'
 
@@ -149,6 +149,9 @@ class FakeProcess(Process):
                     self._stdout.write('\n'.join(current_outputs))
                 self._stdout.write('\n')
                 self._stdout.flush()
+                # Leave the cursor at the start so streaming readers see the
+                # output; getvalue()-based readers are unaffected.
+                self._stdout.seek(0)
                 # If no return code was explicitly specified for this time
                 # period, fall back to the `succeeds` setting
                 if self._returncode is None:
@@ -19,24 +19,25 @@ class TestCaseWithIO(unittest.TestCase):
 
     # Unit test "constructor" and "destructor"
 
+    # Input is provided through an instance StringIO wired to the host's
+    # fd_in, rather than by patching the process-global sys.stdin; tests are
+    # independent even when run concurrently in one process.
+
     def setUp(self):
-        sys.stdin = StringIO()
+        self._stdin = StringIO()
         self._stdout = StringIO()
         self._stderr = StringIO()
 
-    def tearDown(self):
-        sys.stdin = sys.__stdin__
-
     # Unit test utilities
 
     def set_input(self, *lines):
-        sys.stdin.truncate(0)
-        sys.stdin.seek(0)
+        self._stdin.truncate(0)
+        self._stdin.seek(0)
         for line in lines:
-            sys.stdin.write(line)
-            sys.stdin.write('\n')
-        sys.stdin.flush()
-        sys.stdin.seek(0)
+            self._stdin.write(line)
+            self._stdin.write('\n')
+        self._stdin.flush()
+        self._stdin.seek(0)
 
     # Unit test assertions
 
@@ -82,6 +83,7 @@ class TestCaseWithFactory(TestCaseWithIO):
     def setUp(self):
         super(TestCaseWithFactory, self).setUp()
         self._factory = None
+        self._symbolize_cmd = None
 
     # Unit test context, as aliases to the Factory.
 
@@ -90,6 +92,7 @@ class TestCaseWithFactory(TestCaseWithIO):
         """The associated FakeFactory object."""
         if not self._factory:
             self._factory = FakeFactory()
+            self.host.fd_in = self._stdin
             self.host.fd_out = self._stdout
             self.host.fd_err = self._stderr
         return self._factory
@@ -99,10 +102,22 @@ class TestCaseWithFactory(TestCaseWithIO):
         """The associated Host object."""
         return self.factory.host
 
+    # Building the full subparser tree is relatively expensive and the result
+    # is stateless apart from the host used for output, so one parser is
+    # shared by all tests and re-pointed at each test's fake host.
+    _parser = None
+
     @property
     def parser(self):
         """The associated ArgParser object."""
-        return self.factory.parser
+        if not TestCaseWithFactory._parser:
+            TestCaseWithFactory._parser = self.factory.parser
+        parser = TestCaseWithFactory._parser
+        if parser.host is not self.host:
+            parser.host = self.host
+            for subparser in parser._parsers.values():
+                subparser.host = self.host
+        return parser
 
     @property
     def buildenv(self):
@@ -179,25 +194,32 @@ class TestCaseWithFactory(TestCaseWithIO):
         """Prepares the 'ls' response for a file and its parent directory."""
         parts = pathname.split('/')
         dirname = '/'.join(parts[:-1])
-        output = '-rw-r--r-- 1 0 0 {} Dec 25 12:34 {}'.format(size, parts[-1])
+        output = '-rw-r--r-- 1 0 0 {} Dec 25 12:34 {}'
         self.set_outputs(
-            ['ls', '-l', dirname], [output],
+            ['ls', '-l', dirname], [output.format(size, parts[-1])],
             start=start,
             end=end,
             reset=reset,
             ssh=True)
+        # Given a file or glob argument, the device shell expands it before
+        # `ls` runs, so the listing shows the full path rather than the
+        # basename.
         self.set_outputs(
-            ['ls', '-l', pathname], [output],
+            ['ls', '-l', pathname], [output.format(size, pathname)],
             start=start,
             end=end,
             reset=reset,
             ssh=True)
 
     def symbolize_cmd(self):
-        cmd = [self.buildenv.symbolizer_exec]
-        for build_id_dir in self.buildenv.build_id_dirs:
-            cmd += ['--build-id-dir', build_id_dir]
-        return cmd
+        # Memoized; several tests rebuild this command multiple times and the
+        # build environment does not change within a test.
+        if not self._symbolize_cmd:
+            cmd = [self.buildenv.symbolizer_exec]
+            for build_id_dir in self.buildenv.build_id_dirs:
+                cmd += ['--build-id-dir', build_id_dir]
+            self._symbolize_cmd = cmd
+        return self._symbolize_cmd
 
     def infra_testrunner_cmd(self, out_dir, test_file):
         cmd = [os.path.join(self.buildenv.build_dir, 'host_x64', 'testrunner')] \
@@ -274,6 +296,23 @@ class TestCaseWithFuzzer(TestCaseWithFactory):
     def ns(self):
         return self.fuzzer.ns
 
+    # Computed once per fuzzer; several tests re-derive these identically.
+
+    @property
+    def label_parts(self):
+        """The current fuzzer's GN label, split into directory and name."""
+        if not self._label_parts:
+            self._label_parts = self.fuzzer.label.split(':')
+        return self._label_parts
+
+    @property
+    def build_gn(self):
+        """Path to the BUILD.gn declaring the current fuzzer."""
+        if not self._build_gn:
+            self._build_gn = self.buildenv.abspath(
+                self.label_parts[0], 'BUILD.gn')
+        return self._build_gn
+
     # Unit test utilities
 
     def create_fuzzer(self, *args, **kwargs):
@@ -283,6 +322,8 @@ class TestCaseWithFuzzer(TestCaseWithFactory):
         args = self.parse_args(*args)
         self._fuzzer = self.factory.create_fuzzer(
             args, include_tests=include_tests)
+        self._label_parts = None
+        self._build_gn = None
         if resolve:
             self.resolve_fuzzer()
         else:
@@ -2,53 +2,89 @@
 # Use of this source code is governed by a BSD-style license that can be
 # found in the LICENSE file.
 
+import re
+import sys
+import types
+
 # These are a set of temporarily allowed exceptions to the area dependency
 # rules. This data is a mapping from areas to target prefixes.  Any target
 # within an area is allowed to depend on any target whose label starts with a
 # prefix in that area's list.
-exceptions = {
-    '//src/cobalt': ['//src/connectivity/wlan/lib/mlme/cpp:mlme',],
+_exceptions = {
+    '//src/cobalt': ('//src/connectivity/wlan/lib/mlme/cpp:mlme',),
     '//src/connectivity/network':
-        [
+        (
             '//src/go/grand_unified_binary:grand_unified_binary',
             '//src/connectivity/network/testing/netemul/lib/',
-        ],
+        ),
     '//src/connectivity/network/netstack3':
-        ['//src/connectivity/network/testing/netemul/lib/',],
+        ('//src/connectivity/network/testing/netemul/lib/',),
     '//src/connectivity/network/testing/netemul':
-        ['//garnet/lib/process:process',],
+        ('//garnet/lib/process:process',),
     '//src/connectivity/wlan':
-        [
+        (
             '//garnet/lib/wlan/',
             '//src/connectivity/wlan/drivers',
-        ],
-    '//src/connectivity/wlan/drivers': ['//garnet/lib/wlan/',],
-    '//src/connectivity/wlan/tools/wlantool': ['//garnet/lib/wlan/',],
-    '//src/connectivity/wlan/wlancfg': ['//garnet/lib/wlan/',],
+        ),
+    '//src/connectivity/wlan/drivers': ('//garnet/lib/wlan/',),
+    '//src/connectivity/wlan/tools/wlantool': ('//garnet/lib/wlan/',),
+    '//src/connectivity/wlan/wlancfg': ('//garnet/lib/wlan/',),
     '//src/connectivity/wlan/wlanstack':
-        [
+        (
             '//garnet/lib/wlan/',
             '//src/connectivity/wlan/testing/wlantap-client',
-        ],
-    '//src/developer/debug': ['//garnet/lib/process:process',],
-    '//src/developer/feedback_agent': ['//src/ui/lib/escher/test',],
+        ),
+    '//src/developer/debug': ('//garnet/lib/process:process',),
+    '//src/developer/feedback_agent': ('//src/ui/lib/escher/test',),
     '//src/modular':
-        [
+        (
             '//garnet/testing/benchmarking',
             '//src/modular/bin',
             '//peridot/lib',
             '//peridot/public',
-        ],
-    '//src/stories/bin/discovermgr': ['//src/sys/component_index/fidl',],
-    '//src/sys': ['//examples/components/',],
-    '//src/testing/host-target-testing': ['//garnet/go/src',],
-    '//src/ui': ['//garnet/bin/ui',],
-    '//src/ui/examples/escher': ['//garnet/bin/ui',],
+        ),
+    '//src/stories/bin/discovermgr': ('//src/sys/component_index/fidl',),
+    '//src/sys': ('//examples/components/',),
+    '//src/testing/host-target-testing': ('//garnet/go/src',),
+    '//src/ui': ('//garnet/bin/ui',),
+    '//src/ui/examples/escher': ('//garnet/bin/ui',),
     '//src/virtualization':
-        [
+        (
             '//src/graphics/lib/magma',
             '//garnet/packages/experimental:debian_guest',
             '//garnet/packages/experimental:zircon_guest',
             '//garnet/packages/prod:guest_runner',
-        ],
+        ),
+}
+
+# Exposed read-only: the data is consulted, never modified, and tuples in a
+# mapping proxy are both smaller and faster to iterate than lists in a
+# mutable dict. Several prefixes repeat across areas (e.g.
+# '//garnet/lib/wlan/'); interning them makes every occurrence share one
+# string object, which saves memory and lets equality checks short-circuit
+# on identity.
+exceptions = types.MappingProxyType(
+    {
+        area: tuple(sys.intern(prefix) for prefix in prefixes)
+        for area, prefixes in _exceptions.items()
+    })
+
+# Indexes derived from `exceptions` at import time. Checking a label against
+# an area otherwise requires a linear startswith() scan over the area's list
+# for every candidate; the frozenset answers exact-label lookups in constant
+# time. The fallback is a compiled alternation of the area's prefixes,
+# anchored at the start of the label, so all prefixes are matched in a single
+# pass through the regex engine rather than one startswith() call apiece.
+_exact = {area: frozenset(prefixes) for area, prefixes in exceptions.items()}
+_prefix = {
+    area: re.compile('|'.join(map(re.escape, prefixes))).match
+    for area, prefixes in exceptions.items()
 }
+
+
+def allowed(area, label):
+    """Returns whether targets in `area` may depend on `label`."""
+    exact = _exact.get(area)
+    if not exact:
+        return False
+    return label in exact or _prefix[area](label) is not None